@@ -0,0 +1,288 @@
+"""
+Shared helpers for packaging tools into archives with Bazel integrity hashes.
+"""
+
+import hashlib
+import base64
+import configparser
+import contextlib
+import http.client
+import json
+import os
+import re
+import shutil
+import ssl
+import subprocess
+import sys
+import tarfile
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Tuple
+
+# Large reads keep the per-chunk Python overhead small next to sha256 itself
+HASH_CHUNK_SIZE = 1 << 20
+
+# Temp directories are removed in the background so the next clone can start
+CLEANUP_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+
+# Submodule archives of a single repository are downloaded concurrently
+SUBMODULE_JOBS = 8
+
+GITHUB_API_URL = 'https://api.github.com'
+
+# One TLS configuration shared by every download; the opener keeps
+# urllib's proxy environment variable and redirect handling
+_SSL_CONTEXT = ssl.create_default_context()
+_URL_OPENER = urllib.request.build_opener(urllib.request.HTTPSHandler(context=_SSL_CONTEXT))
+
+_GITHUB_REPO_RE = re.compile(r'github\.com[:/]([^/]+)/([^/]+?)(?:\.git)?/?$')
+
+# Reject absolute paths and members escaping the destination where supported
+_TAR_EXTRACT_KWARGS = {'filter': 'tar'} if hasattr(tarfile, 'tar_filter') else {}
+
+class SubmoduleArchiveError(Exception):
+    """Raised when a repository's submodules cannot be fetched as GitHub archives."""
+
+def clone_with_submodules(owner: str, repo: str, commit: str, temp_dir: Path):
+    """Shallow clone repository with submodules at specific commit."""
+    clone_dir = temp_dir / repo
+
+    # Create an empty repository so no history is transferred
+    subprocess.run(['git', 'init', '--quiet', str(clone_dir)], check=True)
+    subprocess.run([
+        'git', '-C', str(clone_dir), 'remote', 'add', 'origin',
+        f'https://github.com/{owner}/{repo}.git'
+    ], check=True)
+
+    # Fetch and checkout only the specific commit
+    subprocess.run(
+        ['git', '-C', str(clone_dir), 'fetch', '--depth=1', 'origin', commit],
+        check=True
+    )
+    subprocess.run(
+        ['git', '-C', str(clone_dir), 'checkout', 'FETCH_HEAD'],
+        check=True
+    )
+
+    # Initialize and update submodules, fetching them in parallel
+    subprocess.run([
+        'git', '-C', str(clone_dir), 'submodule', 'update',
+        '--init', '--recursive',
+        '--depth=1', '--jobs=8'
+    ], check=True)
+
+    return clone_dir
+
+def _github_api_json(path: str):
+    """Fetch a JSON document from the GitHub REST API."""
+    request = urllib.request.Request(
+        f"{GITHUB_API_URL}{path}",
+        headers={'Accept': 'application/vnd.github+json'}
+    )
+    token = os.environ.get('GITHUB_TOKEN')
+    if token:
+        # Unredirected so the token is never forwarded to another host
+        request.add_unredirected_header('Authorization', f'Bearer {token}')
+    with _URL_OPENER.open(request, timeout=60) as response:
+        return json.load(response)
+
+def _strip_top_level(tar: tarfile.TarFile):
+    """Yield archive members with the leading repo-commit directory removed."""
+    for member in tar:
+        name = member.name.partition('/')[2]
+        if not name:
+            continue
+        member.name = name
+        if member.islnk():
+            member.linkname = member.linkname.partition('/')[2]
+        yield member
+
+def extract_github_archive(owner: str, repo: str, commit: str, dest_dir: Path):
+    """Stream GitHub archive of a commit and extract its contents into dest_dir."""
+    archive_url = f"https://github.com/{owner}/{repo}/archive/{commit}.tar.gz"
+
+    print(f"  Downloading {archive_url}...", file=sys.stderr)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    with _URL_OPENER.open(archive_url, timeout=60) as response:
+        with tarfile.open(fileobj=response, mode='r|gz') as tar:
+            tar.extractall(dest_dir, members=_strip_top_level(tar), **_TAR_EXTRACT_KWARGS)
+
+def _parse_gitmodules(gitmodules_path: Path) -> Dict[str, str]:
+    """Map submodule paths to their URLs from a .gitmodules file."""
+    parser = configparser.ConfigParser(interpolation=None, strict=False)
+    parser.read(gitmodules_path)
+    return {
+        parser[section]['path']: parser[section]['url']
+        for section in parser.sections()
+        if 'path' in parser[section] and 'url' in parser[section]
+    }
+
+def _resolve_submodule_repo(url: str, owner: str, repo: str) -> Tuple[str, str]:
+    """Resolve a submodule URL to a GitHub (owner, repo) pair."""
+    if url.startswith(('./', '../')):
+        # Relative URLs are resolved against the superproject's remote
+        url = urllib.parse.urljoin(f'https://github.com/{owner}/{repo}/', url)
+
+    repo_match = _GITHUB_REPO_RE.search(url)
+    if not repo_match:
+        raise SubmoduleArchiveError(f"Unsupported submodule URL {url}")
+    return repo_match.group(1), repo_match.group(2)
+
+def fetch_with_submodules(owner: str, repo: str, commit: str, dest_dir: Path):
+    """Assemble a repository and its submodules at specific commit from GitHub archives.
+
+    Submodule commits are read from the GitHub trees API and each one is
+    extracted into its path, recursively. No .git metadata is written.
+    """
+    extract_github_archive(owner, repo, commit, dest_dir)
+
+    gitmodules_path = dest_dir / '.gitmodules'
+    if not gitmodules_path.exists():
+        return
+    submodule_urls = _parse_gitmodules(gitmodules_path)
+
+    tree = _github_api_json(f'/repos/{owner}/{repo}/git/trees/{commit}?recursive=1')
+    if tree.get('truncated'):
+        raise SubmoduleArchiveError(f"Tree listing of {owner}/{repo} is truncated")
+
+    submodules = []
+    for entry in tree['tree']:
+        if entry['type'] != 'commit':
+            continue
+        path = entry['path']
+        if path not in submodule_urls:
+            raise SubmoduleArchiveError(f"No URL for submodule {path} in {owner}/{repo}")
+        sub_owner, sub_repo = _resolve_submodule_repo(submodule_urls[path], owner, repo)
+        submodules.append((sub_owner, sub_repo, entry['sha'], dest_dir / path))
+
+    with ThreadPoolExecutor(max_workers=SUBMODULE_JOBS) as executor:
+        futures = [executor.submit(fetch_with_submodules, *submodule) for submodule in submodules]
+        for future in futures:
+            future.result()
+
+@contextlib.contextmanager
+def create_tarball(source_dir: Path):
+    """Stream a gzip tarball of source directory, compressing with pigz when available.
+
+    Yields the compressed byte stream; tar and compressor exit status is
+    checked once the caller has drained it.
+    """
+    # Get parent directory and directory name
+    parent = source_dir.parent
+    dirname = source_dir.name
+
+    # pigz emits standard gzip, so integrity checks are unaffected
+    pigz = shutil.which('pigz')
+    if pigz:
+        compress_cmd = [pigz, '-p', str(os.cpu_count() or 1), '-c']
+    else:
+        compress_cmd = ['gzip', '-c']
+
+    tar = subprocess.Popen([
+        'tar',
+        '--exclude=.git',
+        '-cf', '-',
+        '-C', str(parent),
+        dirname
+    ], stdout=subprocess.PIPE)
+    compress = subprocess.Popen(compress_cmd, stdin=tar.stdout, stdout=subprocess.PIPE)
+    # Only the compressor reads from tar, so tar sees SIGPIPE if it exits early
+    tar.stdout.close()
+
+    try:
+        yield compress.stdout
+    finally:
+        compress.stdout.close()
+        compress.wait()
+        tar.wait()
+
+    if tar.returncode != 0:
+        raise subprocess.CalledProcessError(tar.returncode, tar.args)
+    if compress.returncode != 0:
+        raise subprocess.CalledProcessError(compress.returncode, compress.args)
+
+def _sha256_base64(digest_bytes: bytes) -> str:
+    """Format a sha256 digest as a Bazel bzlmod integrity string."""
+    hash_base64 = base64.b64encode(digest_bytes).decode('ascii')
+    return f"sha256-{hash_base64}"
+
+def _file_digest(fileobj) -> bytes:
+    """Return the sha256 digest of a binary file object read to EOF."""
+    if sys.version_info >= (3, 11):
+        # Chunking happens in CPython's C loop, not Python bytecode
+        return hashlib.file_digest(fileobj, 'sha256').digest()
+
+    sha256 = hashlib.sha256()
+    while chunk := fileobj.read(HASH_CHUNK_SIZE):
+        sha256.update(chunk)
+    return sha256.digest()
+
+def calculate_github_archive_integrity(owner: str, repo: str, commit: str) -> str:
+    """Stream GitHub archive and calculate its integrity hash."""
+    archive_url = f"https://github.com/{owner}/{repo}/archive/{commit}.tar.gz"
+
+    print(f"  Downloading {archive_url}...", file=sys.stderr)
+    with _URL_OPENER.open(archive_url, timeout=60) as response:
+        return _sha256_base64(_file_digest(response))
+
+def package_tool(tool: dict, output_dir: Path, tag_name: str) -> dict:
+    """Package a tool and return package info."""
+    module_name = tool['module_name']
+    owner = tool['owner']
+    repo = tool['repo']
+    commit = tool['commit']
+
+    print(f"📦 Packaging {module_name}...", file=sys.stderr)
+
+    # Create temp directory for cloning
+    temp_dir = Path(f'/tmp/package_{module_name}')
+    temp_dir.mkdir(exist_ok=True)
+
+    try:
+        # Directory name matches strip_prefix (repo-commit)
+        target_dirname = f"{repo}-{commit}"
+        target_dir = temp_dir / target_dirname
+
+        try:
+            # Download archives of the repository and all pinned submodules
+            fetch_with_submodules(owner, repo, commit, target_dir)
+        except (SubmoduleArchiveError, OSError, http.client.HTTPException,
+                tarfile.TarError, KeyError, ValueError) as e:
+            # Archive, download or API payload failures can still be cloned
+            print(f"⚠️ {module_name}: {e}, falling back to git clone", file=sys.stderr)
+            shutil.rmtree(target_dir, ignore_errors=True)
+
+            # Clone with submodules and rename to match strip_prefix
+            clone_dir = clone_with_submodules(owner, repo, commit, temp_dir)
+            clone_dir.rename(target_dir)
+
+        # Create tarball
+        tarball_name = f"{module_name}-{tag_name}.tar.gz"
+        tarball_path = output_dir / tarball_name
+        # Write tarball and calculate integrity in a single pass over the bytes
+        sha256 = hashlib.sha256()
+        with create_tarball(target_dir) as stream, open(tarball_path, 'wb') as f:
+            while chunk := stream.read(HASH_CHUNK_SIZE):
+                f.write(chunk)
+                sha256.update(chunk)
+        integrity = _sha256_base64(sha256.digest())
+
+        # Write integrity to separate file
+        integrity_file = output_dir / f"{tarball_name}.sha256"
+        integrity_file.write_text(integrity)
+
+        print(f"✅ {module_name}: {integrity}", file=sys.stderr)
+
+        return {
+            'module_name': module_name,
+            'tarball_name': tarball_name,
+            'integrity': integrity,
+            'commit': commit,
+            'strip_prefix': target_dirname  # Use the renamed directory name
+        }
+
+    finally:
+        # Cleanup temp directory off the critical path
+        CLEANUP_EXECUTOR.submit(shutil.rmtree, temp_dir, ignore_errors=True)
@@ -7,6 +7,40 @@ import json
 import sys
 from pathlib import Path
 
+# Templates are parsed once and filled per tool with %-formatting
+_TOOL_LINE_TMPL = "- **%(module_name)s** (commit [`%(short_commit)s`](%(commit_url)s))\n"
+
+_WITH_SUB_TMPL = """bazel_dep(name = "%(module_name)s", version = "1.0.0")
+archive_override(
+    module_name = "%(module_name)s",
+    urls = ["%(url)s"],
+    strip_prefix = "%(strip_prefix)s",
+    integrity = "%(integrity)s",
+)
+
+"""
+
+_WITHOUT_SUB_TMPL = _WITH_SUB_TMPL
+
+_WITHOUT_SUB_NO_INTEGRITY_TMPL = """bazel_dep(name = "%(module_name)s", version = "1.0.0")
+archive_override(
+    module_name = "%(module_name)s",
+    urls = ["%(url)s"],
+    strip_prefix = "%(strip_prefix)s",
+    # Note: No integrity hash provided for GitHub archives
+    # You can calculate it with: curl -L <url> | sha256sum | xxd -r -p | base64 -w0
+)
+
+"""
+
+def _tool_line(tool: dict) -> str:
+    """Format a tool list entry linking to its pinned commit."""
+    return _TOOL_LINE_TMPL % {
+        'module_name': tool['module_name'],
+        'short_commit': tool['commit'][:7],
+        'commit_url': f"https://github.com/{tool['owner']}/{tool['repo']}/commit/{tool['commit']}",
+    }
+
 def main():
     if len(sys.argv) != 5:
         print("Usage: generate_release_notes.py <packages_dir> <tools_info_json> <tag_name> <repository>", file=sys.stderr)
@@ -40,7 +74,8 @@ def main():
     integrity_lookup = {item['module_name']: item for item in no_submodule_integrities}
 
     # Generate release notes
-    notes = f"""Automated CI release - archive_override for all git_override tools.
+    out = []
+    out.append("""Automated CI release - archive_override for all git_override tools.
 
 ---
 
@@ -49,21 +84,19 @@ def main():
 This release provides **archive_override** configurations for ALL tools that use `git_override` in MODULE.bazel:
 
 ### Tools WITH Submodules (pre-packaged with submodules included)
-"""
+""")
 
     for tool in tools_info['with_submodules']:
-        commit_url = f"https://github.com/{tool['owner']}/{tool['repo']}/commit/{tool['commit']}"
-        notes += f"- **{tool['module_name']}** (commit [`{tool['commit'][:7]}`]({commit_url}))\n"
+        out.append(_tool_line(tool))
 
-    notes += f"""
+    out.append("""
 ### Tools WITHOUT Submodules (using GitHub archive URLs)
-"""
+""")
 
     for tool in tools_info['without_submodules']:
-        commit_url = f"https://github.com/{tool['owner']}/{tool['repo']}/commit/{tool['commit']}"
-        notes += f"- **{tool['module_name']}** (commit [`{tool['commit'][:7]}`]({commit_url}))\n"
+        out.append(_tool_line(tool))
 
-    notes += f"""
+    out.append("""
 
 ---
 
@@ -72,35 +105,32 @@ This release provides **archive_override** configurations for ALL tools that use
 Replace `git_override` with `archive_override` for faster CI builds:
 
 ```bzl
-"""
+""")
 
     # First output tools WITH submodules (from packaged archives)
-    notes += """# =============================================================================
+    out.append("""# =============================================================================
 # Tools WITH submodules - use CI-packaged archives
 # =============================================================================
 
-"""
+""")
     for tool in tools_info['with_submodules']:
         module_name = tool['module_name']
         if module_name in packaged_lookup:
             pkg = packaged_lookup[module_name]
             url = f"https://github.com/{repository}/releases/download/{tag_name}/{pkg['tarball_name']}"
-            notes += f"""bazel_dep(name = "{module_name}", version = "1.0.0")
-archive_override(
-    module_name = "{module_name}",
-    urls = ["{url}"],
-    strip_prefix = "{pkg['strip_prefix']}",
-    integrity = "{pkg['integrity']}",
-)
-
-"""
+            out.append(_WITH_SUB_TMPL % {
+                'module_name': module_name,
+                'url': url,
+                'strip_prefix': pkg['strip_prefix'],
+                'integrity': pkg['integrity'],
+            })
 
     # Then output tools WITHOUT submodules (direct GitHub archive)
-    notes += """# =============================================================================
+    out.append("""# =============================================================================
 # Tools WITHOUT submodules - use direct GitHub archive
 # =============================================================================
 
-"""
+""")
     for tool in tools_info['without_submodules']:
         module_name = tool['module_name']
         owner = tool['owner']
@@ -113,30 +143,21 @@ archive_override(
 
         # Check if we have pre-calculated integrity
         if module_name in integrity_lookup:
-            integrity = integrity_lookup[module_name]['integrity']
-            notes += f"""bazel_dep(name = "{module_name}", version = "1.0.0")
-archive_override(
-    module_name = "{module_name}",
-    urls = ["{archive_url}"],
-    strip_prefix = "{strip_prefix}",
-    integrity = "{integrity}",
-)
-
-"""
+            out.append(_WITHOUT_SUB_TMPL % {
+                'module_name': module_name,
+                'url': archive_url,
+                'strip_prefix': strip_prefix,
+                'integrity': integrity_lookup[module_name]['integrity'],
+            })
         else:
             # Fallback: no integrity available
-            notes += f"""bazel_dep(name = "{module_name}", version = "1.0.0")
-archive_override(
-    module_name = "{module_name}",
-    urls = ["{archive_url}"],
-    strip_prefix = "{strip_prefix}",
-    # Note: No integrity hash provided for GitHub archives
-    # You can calculate it with: curl -L <url> | sha256sum | xxd -r -p | base64 -w0
-)
-
-"""
+            out.append(_WITHOUT_SUB_NO_INTEGRITY_TMPL % {
+                'module_name': module_name,
+                'url': archive_url,
+                'strip_prefix': strip_prefix,
+            })
 
-    notes += """```
+    out.append("""```
 
 ---
 
@@ -162,7 +183,7 @@ archive_override(
 1. Scanned `MODULE.bazel` for all `git_override` declarations
 2. Checked each repository for `.gitmodules` file
 3. **For tools WITH submodules:**
-   - Cloned with `git clone --recursive`
+   - Assembled from GitHub archives of the pinned commit and all submodules (git clone fallback)
    - Created tarballs excluding `.git` directories
    - Calculated `sha256-base64` integrity hashes
 4. **For tools WITHOUT submodules:**
@@ -172,9 +193,12 @@ archive_override(
 ---
 
 **Generated by** [rules_hdl CI](https://github.com/{repository}/actions)
-"""
+""")
 
-    print(notes)
+    # Emit the whole document in one write, bypassing the text layer
+    out.append('\n')
+    sys.stdout.buffer.write(''.join(out).encode('utf-8'))
+    sys.stdout.buffer.flush()
 
 if __name__ == '__main__':
     main()
@@ -4,25 +4,55 @@ Scan MODULE.bazel for git_override declarations and check which tools have submo
 Outputs JSON with tool information.
 """
 
+import base64
+import functools
+import http.client
 import json
+import os
 import re
-import subprocess
 import sys
-from typing import Dict, List
+import threading
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+RAW_GITHUB_HOST = 'raw.githubusercontent.com'
+
+# Probe results keyed by "owner/repo@commit"; content at a commit never changes
+PROBE_CACHE_PATH = Path(os.environ.get('GITHUB_WORKSPACE', '.')) / '.submodule_probe_cache.json'
+
+# git_override blocks and their fields, matched independently of field order
+_GIT_OVERRIDE_RE = re.compile(r'git_override\s*\(([^)]*)\)', re.DOTALL)
+_MODULE_NAME_RE = re.compile(r'\bmodule_name\s*=\s*"([^"]+)"')
+_COMMIT_RE = re.compile(r'\bcommit\s*=\s*"([^"]+)"')
+_REMOTE_RE = re.compile(r'\bremote\s*=\s*"([^"]+)"')
+_GITHUB_REPO_RE = re.compile(r'github\.com[:/]([^/]+)/([^/\.]+)')
+
+# Each probe worker keeps its own keep-alive connection
+_thread_local = threading.local()
 
 def parse_git_overrides(module_bazel_path: str) -> List[Dict[str, str]]:
     """Parse git_override declarations from MODULE.bazel."""
     with open(module_bazel_path, 'r') as f:
         content = f.read()
 
-    # Match git_override blocks
-    pattern = r'git_override\s*\(\s*module_name\s*=\s*"([^"]+)"[^)]*commit\s*=\s*"([^"]+)"[^)]*remote\s*=\s*"([^"]+)"'
-    matches = re.findall(pattern, content, re.DOTALL)
-
     tools = []
-    for module_name, commit, remote in matches:
+    for block in _GIT_OVERRIDE_RE.finditer(content):
+        body = block.group(1)
+        module_name_match = _MODULE_NAME_RE.search(body)
+        commit_match = _COMMIT_RE.search(body)
+        remote_match = _REMOTE_RE.search(body)
+        if not (module_name_match and commit_match and remote_match):
+            continue
+
+        module_name = module_name_match.group(1)
+        commit = commit_match.group(1)
+        remote = remote_match.group(1)
+
         # Extract owner/repo from remote URL
-        repo_match = re.search(r'github\.com[:/]([^/]+)/([^/\.]+)', remote)
+        repo_match = _GITHUB_REPO_RE.search(remote)
         if repo_match:
             owner = repo_match.group(1)
             repo = repo_match.group(2)
@@ -36,27 +66,95 @@ def parse_git_overrides(module_bazel_path: str) -> List[Dict[str, str]]:
 
     return tools
 
-def check_submodules(owner: str, repo: str, commit: str) -> bool:
-    """Check if a repository has submodules at the given commit."""
-    gitmodules_url = f"https://raw.githubusercontent.com/{owner}/{repo}/{commit}/.gitmodules"
+def _new_raw_github_connection() -> http.client.HTTPSConnection:
+    """Open a raw.githubusercontent.com connection, tunnelling through any HTTPS proxy."""
+    proxy = urllib.request.getproxies().get('https')
+    if not proxy or urllib.request.proxy_bypass(RAW_GITHUB_HOST):
+        return http.client.HTTPSConnection(RAW_GITHUB_HOST, timeout=10)
+
+    proxy_url = urllib.parse.urlsplit(proxy if '://' in proxy else f'http://{proxy}')
+    proxy_port = proxy_url.port or (443 if proxy_url.scheme == 'https' else 80)
+    tunnel_headers = {}
+    if proxy_url.username:
+        credentials = f"{urllib.parse.unquote(proxy_url.username)}:{urllib.parse.unquote(proxy_url.password or '')}"
+        tunnel_headers['Proxy-Authorization'] = 'Basic ' + base64.b64encode(credentials.encode()).decode('ascii')
+
+    connection = http.client.HTTPSConnection(proxy_url.hostname, proxy_port, timeout=10)
+    connection.set_tunnel(RAW_GITHUB_HOST, 443, headers=tunnel_headers)
+    return connection
+
+def _raw_github_connection() -> http.client.HTTPSConnection:
+    """Return the persistent raw.githubusercontent.com connection for this thread."""
+    connection = getattr(_thread_local, 'connection', None)
+    if connection is None:
+        connection = _new_raw_github_connection()
+        _thread_local.connection = connection
+    return connection
+
+@functools.lru_cache(maxsize=None)
+def check_submodules(owner: str, repo: str, commit: str) -> Optional[bool]:
+    """Check if a repository has submodules at the given commit.
+
+    Returns None when the probe fails or gets an unexpected status.
+    """
+    gitmodules_path = f"/{owner}/{repo}/{commit}/.gitmodules"
+    # Retry once in case the server closed an idle keep-alive connection
+    for _ in range(2):
+        connection = _raw_github_connection()
+        try:
+            connection.request('HEAD', gitmodules_path)
+            response = connection.getresponse()
+            response.read()
+            if response.status == 200:
+                return True
+            if response.status == 404:
+                return False
+            return None
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            _thread_local.connection = None
+    return None
+
+def load_probe_cache() -> Dict[str, bool]:
+    """Load cached submodule probe results, if any."""
     try:
-        result = subprocess.run(
-            ['curl', '-sf', gitmodules_url],
-            capture_output=True,
-            timeout=10
-        )
-        return result.returncode == 0
-    except:
-        return False
+        with open(PROBE_CACHE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_probe_cache(cache: Dict[str, bool]):
+    """Persist submodule probe results for later runs."""
+    with open(PROBE_CACHE_PATH, 'w') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
 
 def main():
     tools = parse_git_overrides('MODULE.bazel')
+    probe_cache = load_probe_cache()
 
     tools_with_submodules = []
     tools_without_submodules = []
 
+    # Probe uncached repositories concurrently over pooled connections
+    pending = sorted({
+        (tool['owner'], tool['repo'], tool['commit'])
+        for tool in tools
+        if f"{tool['owner']}/{tool['repo']}@{tool['commit']}" not in probe_cache
+    })
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = executor.map(lambda key: check_submodules(*key), pending)
+
+    for (owner, repo, commit), has_submodules in zip(pending, results):
+        # Only definitive answers are cached; failed probes are retried next run
+        if has_submodules is None:
+            print(f"⚠️ Could not probe .gitmodules for {owner}/{repo}@{commit}, "
+                  "assuming no submodules", file=sys.stderr)
+        else:
+            probe_cache[f"{owner}/{repo}@{commit}"] = has_submodules
+
     for tool in tools:
-        has_submodules = check_submodules(tool['owner'], tool['repo'], tool['commit'])
+        cache_key = f"{tool['owner']}/{tool['repo']}@{tool['commit']}"
+        has_submodules = probe_cache.get(cache_key, False)
         tool['has_submodules'] = has_submodules
 
         if has_submodules:
@@ -64,6 +162,8 @@ def main():
         else:
             tools_without_submodules.append(tool)
 
+    save_probe_cache(probe_cache)
+
     output = {
         'with_submodules': tools_with_submodules,
         'without_submodules': tools_without_submodules